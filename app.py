@@ -4,7 +4,8 @@ from decimal import Decimal
 from datetime import datetime, timedelta, timezone
 from flask import Flask, render_template, request, redirect, url_for, flash, session, send_file
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import inspect
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -12,13 +13,20 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 
 from config import Config
-from models import db, User, Notification, Contact, Admin, AdminDirector, Nouveaute, NouveauteLue, Transaction
+from hashing import HashingPool, HashingPoolBusy
+from ratelimit import RateLimiter
+from models import db, User, UserIdentifier, Notification, Contact, Admin, AdminDirector, Nouveaute, NouveauteLue, Transaction
 
 app = Flask(__name__)
 app.config.from_object(Config)
 app.config['UPLOAD_FOLDER'] = os.path.join("static", "uploads")
 app.config['ALLOWED_IMAGE_EXT'] = {"png", "jpg", "jpeg", "gif", "webp"}
+if app.config.get("TRUSTED_PROXIES", 0) > 0:
+    # IP client réelle (X-Forwarded-For) derrière le proxy de l'hébergeur, utilisée par le rate limiter
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXIES"], x_proto=app.config["TRUSTED_PROXIES"])
 db.init_app(app)
+hasher = HashingPool(app)
+limiter = RateLimiter(app)
 
 # --- Timezone helpers ---
 # Kinshasa is UTC+1
@@ -90,6 +98,68 @@ def log_status(username, statut):
     db.session.commit()
 
 
+def normalize_identifier(identifier):
+    return (identifier or "").strip().lower()
+
+
+_identifiers_ready = None
+
+
+def identifiers_table_ready():
+    """
+    True si la table user_identifiers existe. Vérifié une seule fois par processus :
+    après `flask init-db`, redémarrer les workers pour basculer sur la nouvelle table.
+    """
+    global _identifiers_ready
+    if _identifiers_ready is None:
+        _identifiers_ready = inspect(db.engine).has_table(UserIdentifier.__tablename__)
+    return _identifiers_ready
+
+
+def register_identifiers(user: User):
+    """Indexe l'email et le username de l'utilisateur dans user_identifiers (sans commit)."""
+    if not identifiers_table_ready():
+        return
+    existing = {(ui.kind, ui.identifier) for ui in UserIdentifier.query.filter_by(user_id=user.id).all()}
+    wanted = {("email", normalize_identifier(user.email)), ("username", normalize_identifier(user.username))}
+    for kind, key in wanted - existing:
+        db.session.add(UserIdentifier(identifier=key, kind=kind, user_id=user.id))
+
+
+def find_user_by_identifier(identifier):
+    """
+    Recherche un utilisateur par email ou username via l'index unique user_identifiers
+    (l'email l'emporte si les deux correspondent) : une seule requête, trouvé ou non.
+    La table est remplie par `flask init-db` / `flask backfill-identifiers` puis à l'inscription ;
+    tant qu'elle n'existe pas on garde l'ancienne recherche sur les colonnes.
+    """
+    key = normalize_identifier(identifier)
+    if not key:
+        return None
+    if not identifiers_table_ready():
+        return User.query.filter((User.email == key) | (User.username == key.upper())).first()
+    return (User.query.join(UserIdentifier, UserIdentifier.user_id == User.id)
+            .filter(UserIdentifier.identifier == key)
+            .order_by(UserIdentifier.kind).first())
+
+
+def check_and_rehash(account, password):
+    """
+    Vérifie le mot de passe via le pool de hachage et, si le coût configuré a changé,
+    remplace le hash stocké (reporté à la prochaine connexion si le pool est saturé).
+    Peut lever HashingPoolBusy pendant la vérification.
+    """
+    if not hasher.check(account.password_hash, password):
+        return False
+    if hasher.needs_rehash(account.password_hash):
+        try:
+            account.password_hash = hasher.generate(password)
+        except HashingPoolBusy:
+            return True
+        db.session.commit()
+    return True
+
+
 def require_user():
     if "user_id" not in session:
         return redirect(url_for("login"))
@@ -114,6 +184,22 @@ def init_db():
     with app.app_context():
         db.create_all()
         print("DB created")
+        backfill_identifiers()
+
+
+@app.cli.command("backfill-identifiers")
+def backfill_identifiers_command():
+    with app.app_context():
+        backfill_identifiers()
+
+
+def backfill_identifiers():
+    global _identifiers_ready
+    _identifiers_ready = None  # la table vient peut-être d'être créée par create_all
+    for user in User.query.all():
+        register_identifiers(user)
+    db.session.commit()
+    print("Identifiants utilisateurs indexés")
 
 
 # --- Routes publiques ---
@@ -157,6 +243,10 @@ def contact():
         if not all(data.values()):
             flash("Veuillez remplir tous les champs.", "danger")
             return redirect(url_for("contact"))
+        # Seaux débités seulement pour un formulaire valide, juste avant l'insertion
+        retry = limiter.check("contact", data["email"])
+        if retry:
+            return limiter.throttled(retry)
         c = Contact(**data)
         db.session.add(c)
         db.session.commit()
@@ -192,6 +282,11 @@ def signup():
         while User.query.filter_by(numero_compte=numero_compte).first():
             numero_compte = generate_account_number()
 
+        # Seaux débités seulement une fois le formulaire validé (photo + hachage sont coûteux)
+        retry = limiter.check("signup", email)
+        if retry:
+            return limiter.throttled(retry)
+
         # 📸 Gestion de la photo
         photo = request.files.get("photo_profil")
         photo_path = None
@@ -209,6 +304,12 @@ def signup():
                 flash("Format de photo non autorisé.", "danger")
                 return redirect(url_for("signup"))
 
+        try:
+            password_hash = hasher.generate(form["password"])
+        except HashingPoolBusy:
+            flash("Service momentanément surchargé, veuillez réessayer.", "danger")
+            return redirect(url_for("signup"))
+
         # 👤 Création utilisateur
         u = User(
             nom=form["nom"].strip(),
@@ -222,12 +323,14 @@ def signup():
             photo_profil=photo_path,
             numero_compte=numero_compte,
             solde=Decimal("0.00"),
-            password_hash=generate_password_hash(form["password"])
+            password_hash=password_hash
         )
         statut = f"{u.nom}_{u.post_nom}_{u.prenom}"
         # Notify admin / log
         db.session.add(Notification(username=u.email, statut=f"Nouveau client (e): {statut}", created_at=now_utc()))
         db.session.add(u)
+        db.session.flush()
+        register_identifiers(u)
         db.session.commit()
         flash("Compte créé, vous pouvez vous connecter.", "success")
         return redirect(url_for("login"))
@@ -237,6 +340,7 @@ def signup():
 
 
 @app.route("/login", methods=["GET","POST"])
+@limiter.limit("login")
 def login():
     if request.method == "POST":
         identifier = request.form.get("identifier","").strip()
@@ -244,18 +348,29 @@ def login():
         if not identifier or not password:
             flash("Veuillez renseigner votre adresse email/username et mot de passe.", "danger")
             return redirect(url_for("login"))
-        user = User.query.filter((User.email==identifier.lower()) | (User.username==identifier.upper())).first()
-        if user and check_password_hash(user.password_hash, password):
+        # Le seau identifiant ne se vide que sur échec : une connexion réussie ne coûte rien
+        retry = limiter.identifier_retry("login", identifier)
+        if retry:
+            return limiter.throttled(retry)
+        user = find_user_by_identifier(identifier)
+        try:
+            ok = user is not None and check_and_rehash(user, password)
+        except HashingPoolBusy:
+            flash("Service momentanément surchargé, veuillez réessayer.", "danger")
+            return render_template("login.html", page="services"), 503
+        if ok:
             session.clear()
             session["user_id"] = user.id
             ensure_monthly_fee(user)
             flash("Connexion réussie.", "success")
             return redirect(url_for("dashboard"))
+        limiter.charge_identifier("login", identifier)
         flash("Identifiants invalides.", "danger")
     return render_template("login.html", page="services")
 
 
 @app.route("/forgot", methods=["POST"])
+@limiter.limit("forgot", identifier_field="identifier", redirect_endpoint="login")
 def forgot():
     identifier = request.form.get("identifier","").strip()
     if not identifier:
@@ -375,7 +490,12 @@ def admin_login():
         username = request.form.get("username","").strip()
         password = request.form.get("password","").strip()
         admin = Admin.query.filter_by(username=username).first()
-        if admin and check_password_hash(admin.password_hash, password):
+        try:
+            ok = admin is not None and check_and_rehash(admin, password)
+        except HashingPoolBusy:
+            flash("Service momentanément surchargé, veuillez réessayer.", "danger")
+            return render_template("admin.html", login_only=True), 503
+        if ok:
             session.clear()
             session["admin_id"] = admin.id
             flash("Admin connecté.", "success")
@@ -390,7 +510,12 @@ def admin_director_login():
         username = request.form.get("username","").strip()
         password = request.form.get("password","").strip()
         adm = AdminDirector.query.filter_by(username=username).first()
-        if adm and check_password_hash(adm.password_hash, password):
+        try:
+            ok = adm is not None and check_and_rehash(adm, password)
+        except HashingPoolBusy:
+            flash("Service momentanément surchargé, veuillez réessayer.", "danger")
+            return render_template("admin_director.html", login_only=True), 503
+        if ok:
             session["admin_director_id"] = adm.id
             flash("Admin Director connecté.", "success")
             return redirect(url_for("admin_director_panel"))
@@ -407,7 +532,8 @@ def admin_panel():
     stats = {
         "nb_users": User.query.count(),
         "nb_messages": Contact.query.count(),
-        "total_solde": db.session.query(db.func.coalesce(db.func.sum(User.solde), 0)).scalar()
+        "total_solde": db.session.query(db.func.coalesce(db.func.sum(User.solde), 0)).scalar(),
+        "hashing": hasher.stats()
     }
 
     last_notifs = Notification.query.order_by(Notification.created_at.desc()).limit(200).all()
@@ -506,10 +632,14 @@ def admin_director_panel():
                 flash("Nouvelle supprimée !", "success")
         elif action == "reset_password":
             identifier = request.form.get("identifier", "").strip()
-            user = User.query.filter((User.email==identifier.lower()) | (User.username==identifier.upper())).first()
+            user = find_user_by_identifier(identifier)
             if user:
                 temp = f"TMP{random.randint(1000000, 9999999)}"
-                user.password_hash = generate_password_hash(temp)
+                try:
+                    user.password_hash = hasher.generate(temp)
+                except HashingPoolBusy:
+                    flash("Service momentanément surchargé, veuillez réessayer.", "danger")
+                    return redirect(url_for("admin_director_panel"))
                 db.session.add(Notification(username=user.username, statut=f"Mot de passe réinitialisé. Nouveau mot de passe: {temp}", created_at=now_utc()))
                 db.session.commit()
                 flash("Mot de passe réinitialisé avec succès (le nouveau mot de passe est communiqué via notification).", "success")
@@ -548,6 +678,7 @@ if __name__ == "__main__":
         try:
             db.create_all()
             print("✅ Base de données initialisée (tables créées).")
+            backfill_identifiers()
         except Exception as e:
             # Erreur de connexion (ex: psycopg2.OperationalError si Postgres indisponible)
             print("‼️ Impossible de créer les tables :")
@@ -22,6 +22,34 @@ class Config:
     # Pagination / autres valeurs par défaut
     ITEMS_PER_PAGE = int(os.environ.get("ITEMS_PER_PAGE", 20))
 
+    # Hachage des mots de passe : méthode werkzeug (changer le coût déclenche un rehash à la connexion)
+    # Ex: "scrypt", "scrypt:65536:8:1", "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    # Pool et file bornés PAR PROCESSUS : avec N workers gunicorn, au plus N x HASH_POOL_WORKERS
+    # hachages simultanés. Les compteurs affichés dans /admin ne concernent que le worker qui répond.
+    HASH_POOL_WORKERS = int(os.environ.get("HASH_POOL_WORKERS", 1))
+    HASH_POOL_MAX_PENDING = int(os.environ.get("HASH_POOL_MAX_PENDING", 32))
+
+    # Limitation de débit (seaux à jetons partagés entre workers via un fichier SQLite local)
+    RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "1") == "1"
+    RATELIMIT_STORAGE = os.environ.get("RATELIMIT_STORAGE", os.path.join(basedir, "ratelimit.sqlite3"))
+    RATELIMIT_SWEEP_INTERVAL = int(os.environ.get("RATELIMIT_SWEEP_INTERVAL", 60))
+    # Nombre de proxys de confiance devant l'app (ex: 1 derrière le proxy d'un hébergeur).
+    # Le rate limiter prend alors l'IP client dans X-Forwarded-For (werkzeug ProxyFix) ;
+    # à 0 tous les clients derrière un proxy partageraient le même seau "ip".
+    # Ne pas activer sans proxy : l'en-tête serait falsifiable par le client.
+    TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", 0))
+    # route -> {"ip" / "identifier": (capacité du seau, secondes pour le remplir)}
+    # Le seau "identifier" est clé par identifiant seul (toutes IP confondues), sauf avec
+    # "identifier_per_ip": True (clé IP + identifiant). Login l'utilise pour qu'on ne puisse pas bloquer
+    # un utilisateur à distance. Pour login, ce seau ne se vide que sur mot de passe erroné.
+    RATELIMITS = {
+        "login": {"ip": (30, 300), "identifier": (10, 600), "identifier_per_ip": True},
+        "forgot": {"ip": (5, 3600), "identifier": (3, 3600)},
+        "signup": {"ip": (5, 3600), "identifier": (3, 3600)},
+        "contact": {"ip": (5, 600), "identifier": (3, 600)},
+    }
+
     # Valeurs monétaires par défaut
     DEFAULT_CURRENCY = "CDF"
 
@@ -0,0 +1,75 @@
+# hashing.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingPoolBusy(RuntimeError):
+    """Levée quand la file d'attente du pool de hachage est pleine."""
+
+
+class HashingPool:
+    """
+    Exécute le hachage des mots de passe (CPU intensif) dans un pool de threads borné,
+    pour qu'une rafale de connexions n'affame pas les autres routes.
+    Les bornes et les compteurs sont propres au processus (un pool par worker).
+    S'initialise comme les extensions Flask : hasher = HashingPool(); hasher.init_app(app).
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.method = None
+        self.method_prefix = None
+        self.max_workers = 0
+        self.max_pending = 0
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+        self.max_workers = int(app.config.get("HASH_POOL_WORKERS", 1))
+        self.max_pending = int(app.config.get("HASH_POOL_MAX_PENDING", 32))
+        # Forme canonique de la méthode (ex: "scrypt" -> "scrypt:32768:8:1"), pour needs_rehash
+        self.method_prefix = generate_password_hash("", method=self.method).split("$", 1)[0]
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pwhash")
+        app.extensions["hashing_pool"] = self
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashingPoolBusy("File de hachage saturée")
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def generate(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True si le hash stocké n'a pas été produit avec la méthode/coût configuré."""
+        return pwhash.split("$", 1)[0] != self.method_prefix
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "peak_pending": self._peak_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
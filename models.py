@@ -36,6 +36,16 @@ class User(db.Model):
         return f"<User {self.username} ({self.numero_compte})>"
 
 
+class UserIdentifier(db.Model):
+    """Identifiants de connexion normalisés (email et username en minuscules), index unique sur (identifier, kind)."""
+    __tablename__ = "user_identifiers"
+    __table_args__ = (db.UniqueConstraint("identifier", "kind", name="uq_user_identifiers_identifier_kind"),)
+    id = db.Column(db.Integer, primary_key=True)
+    identifier = db.Column(db.String(150), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # 'email' ou 'username'
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+
+
 class Notification(db.Model):
     __tablename__ = "notifications"
     id = db.Column(db.Integer, primary_key=True)
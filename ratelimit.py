@@ -0,0 +1,169 @@
+# ratelimit.py
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import request, redirect, url_for, flash
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Limiteur de débit par seaux à jetons (token buckets), clé par IP et par identifiant.
+    Les seaux vivent dans un petit fichier SQLite partagé par tous les workers de la machine.
+    Un seau plein est équivalent à un seau absent : il est supprimé lors du balayage périodique.
+    S'initialise comme les extensions Flask : limiter = RateLimiter(); limiter.init_app(app).
+    """
+
+    def __init__(self, app=None):
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self.enabled = True
+        self.path = None
+        self.rules = {}
+        self.sweep_interval = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RATELIMIT_ENABLED", True)
+        self.path = app.config.get("RATELIMIT_STORAGE", "ratelimit.sqlite3")
+        self.rules = app.config.get("RATELIMITS", {})
+        self.sweep_interval = app.config.get("RATELIMIT_SWEEP_INTERVAL", 60)
+        try:
+            conn = self._conn()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)")
+        except sqlite3.Error as e:
+            # Stockage inaccessible : le site démarre quand même et les requêtes passent sans limite
+            logger.warning("Rate limiter indisponible : %s", e)
+        app.extensions["rate_limiter"] = self
+
+    def _conn(self):
+        # Une connexion par thread et par processus (une connexion SQLite ne survit pas à un fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _level(self, conn, key, capacity, rate, now):
+        row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        return capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+
+    def peek(self, key, capacity, period):
+        """Délai en secondes avant le prochain jeton du seau `key`, sans rien consommer (0 = jeton disponible)."""
+        rate = capacity / period
+        try:
+            tokens = self._level(self._conn(), key, capacity, rate, time.time())
+        except sqlite3.Error as e:
+            # En cas de souci de stockage on laisse passer plutôt que de bloquer les clients légitimes
+            logger.warning("Rate limiter indisponible : %s", e)
+            return 0
+        return 0 if tokens >= 1 else (1 - tokens) / rate
+
+    def hit(self, key, capacity, period):
+        """
+        Consomme un jeton du seau `key` (capacité `capacity`, rempli en `period` secondes).
+        Renvoie 0 si la requête est autorisée, sinon le délai en secondes avant le prochain jeton.
+        """
+        # Les refus se décident en lecture seule (WAL) : un flood refusé ne prend jamais le verrou d'écriture
+        retry = self.peek(key, capacity, period)
+        if retry:
+            return retry
+        now = time.time()
+        rate = capacity / period
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens = self._level(conn, key, capacity, rate, now)
+                if tokens < 1:
+                    conn.execute("ROLLBACK")
+                    return (1 - tokens) / rate
+                tokens -= 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                    (key, tokens, now, now + (capacity - tokens) / rate),
+                )
+                if now - self._last_sweep >= self.sweep_interval:
+                    self._last_sweep = now
+                    conn.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning("Rate limiter indisponible : %s", e)
+        return 0
+
+    def _identifier_key(self, scope, identifier):
+        identifier = (identifier or "").strip().lower()
+        if not identifier:
+            return None
+        # identifier_per_ip (login) : clé IP + identifiant, pour qu'un attaquant ne vide pas le seau de la victime.
+        # Sinon clé identifiant seul : limite les envois vers une même cible, quelles que soient les IP.
+        if self.rules.get(scope, {}).get("identifier_per_ip"):
+            identifier = f"{request.remote_addr}|{identifier}"
+        raw = identifier.encode("utf-8")
+        return f"{scope}:id:{hashlib.blake2b(raw, digest_size=12).hexdigest()}"
+
+    def check(self, scope, identifier=None):
+        """Applique les règles de `scope` à l'IP courante et à l'identifiant. Renvoie le délai d'attente (0 = autorisé)."""
+        if not self.enabled:
+            return 0
+        rules = self.rules.get(scope, {})
+        if "ip" in rules:
+            retry = self.hit(f"{scope}:ip:{request.remote_addr}", *rules["ip"])
+            if retry:
+                return retry
+        return self.charge_identifier(scope, identifier)
+
+    def identifier_retry(self, scope, identifier):
+        """Délai d'attente du seau identifiant de `scope`, sans consommer de jeton."""
+        key = self._identifier_key(scope, identifier)
+        rule = self.rules.get(scope, {}).get("identifier")
+        if not self.enabled or key is None or rule is None:
+            return 0
+        return self.peek(key, *rule)
+
+    def charge_identifier(self, scope, identifier):
+        """Consomme un jeton du seau identifiant de `scope` (ex: après un mot de passe erroné)."""
+        key = self._identifier_key(scope, identifier)
+        rule = self.rules.get(scope, {}).get("identifier")
+        if not self.enabled or key is None or rule is None:
+            return 0
+        return self.hit(key, *rule)
+
+    def throttled(self, retry, endpoint=None):
+        """Réponse renvoyée à un client limité : message flash + redirection avec Retry-After."""
+        flash("Trop de tentatives, veuillez réessayer dans quelques minutes.", "danger")
+        resp = redirect(url_for(endpoint or request.endpoint))
+        resp.headers["Retry-After"] = str(math.ceil(retry))
+        return resp
+
+    def limit(self, scope, identifier_field=None, redirect_endpoint=None):
+        """Décorateur de vue : limite les requêtes POST selon les règles de `scope`."""
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if self.enabled and request.method == "POST":
+                    identifier = request.form.get(identifier_field) if identifier_field else None
+                    retry = self.check(scope, identifier)
+                    if retry:
+                        return self.throttled(retry, redirect_endpoint)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
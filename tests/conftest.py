@@ -0,0 +1,29 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+# Base SQLite jetable et hachage rapide : à régler avant l'import de app.py
+_tmpdir = tempfile.mkdtemp()
+Config.SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(_tmpdir, "test.sqlite3")
+Config.RATELIMIT_STORAGE = os.path.join(_tmpdir, "ratelimit.sqlite3")
+Config.PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+Config.HASH_POOL_WORKERS = 1
+
+
+@pytest.fixture
+def stimlink():
+    import app as stimlink_app
+    from models import db
+    with stimlink_app.app.app_context():
+        db.create_all()
+        yield stimlink_app
+        db.session.remove()
+        db.drop_all()
+    stimlink_app._identifiers_ready = None
@@ -0,0 +1,90 @@
+# tests/test_auth.py
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from hashing import HashingPoolBusy
+from models import db, User, UserIdentifier
+
+
+def add_user(stimlink, email="jean@example.com", username="JEANDUPONT", password="secret"):
+    u = User(nom="Jean", post_nom="K", prenom="Dupont", username=username, email=email,
+             numero_compte=f"STL-{username}", solde=Decimal("0.00"),
+             password_hash=stimlink.hasher.generate(password))
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def identifiers_of(user):
+    return {(ui.kind, ui.identifier) for ui in UserIdentifier.query.filter_by(user_id=user.id).all()}
+
+
+def test_lookup_uses_identifier_table_once_backfilled(stimlink):
+    u = add_user(stimlink)
+    assert stimlink.find_user_by_identifier("jean@example.com") is None
+    stimlink.backfill_identifiers()
+    assert stimlink.find_user_by_identifier("  JEAN@example.com ").id == u.id
+    assert stimlink.find_user_by_identifier("jeandupont").id == u.id
+
+
+def test_lookup_is_a_single_query(stimlink):
+    add_user(stimlink)
+    stimlink.backfill_identifiers()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        stimlink.find_user_by_identifier("inconnu@example.com")
+        stimlink.find_user_by_identifier("jean@example.com")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert len(statements) == 2
+
+
+def test_backfill_indexes_all_users(stimlink):
+    a = add_user(stimlink)
+    b = add_user(stimlink, email="marie@example.com", username="MARIEK")
+    stimlink.backfill_identifiers()
+    assert identifiers_of(a) == {("email", "jean@example.com"), ("username", "jeandupont")}
+    assert identifiers_of(b) == {("email", "marie@example.com"), ("username", "mariek")}
+
+
+def test_username_cannot_take_email_key(stimlink):
+    a = add_user(stimlink, email="x@y.cd", username="ALICE")
+    b = add_user(stimlink, email="bob@example.com", username="X@Y.CD")
+    stimlink.backfill_identifiers()
+    assert ("email", "x@y.cd") in identifiers_of(a)
+    assert ("username", "x@y.cd") in identifiers_of(b)
+    assert stimlink.find_user_by_identifier("x@y.cd").id == a.id
+
+
+def test_missing_table_falls_back_to_columns(stimlink):
+    u = add_user(stimlink)
+    UserIdentifier.__table__.drop(db.engine)
+    stimlink._identifiers_ready = None
+    assert stimlink.find_user_by_identifier("JEANDUPONT").id == u.id
+    assert stimlink.find_user_by_identifier("jean@example.com").id == u.id
+    UserIdentifier.__table__.create(db.engine)
+
+
+def test_login_rehashes_when_method_changes(stimlink, monkeypatch):
+    u = add_user(stimlink)
+    monkeypatch.setattr(stimlink.hasher, "method", "pbkdf2:sha256:2000")
+    monkeypatch.setattr(stimlink.hasher, "method_prefix", "pbkdf2:sha256:2000")
+    assert stimlink.check_and_rehash(u, "secret")
+    assert u.password_hash.startswith("pbkdf2:sha256:2000$")
+    assert not stimlink.check_and_rehash(u, "wrong")
+
+
+def test_busy_pool_skips_rehash_but_logs_in(stimlink, monkeypatch):
+    u = add_user(stimlink)
+    old_hash = u.password_hash
+    monkeypatch.setattr(stimlink.hasher, "method_prefix", "pbkdf2:sha256:2000")
+
+    def busy(password):
+        raise HashingPoolBusy("File de hachage saturée")
+
+    monkeypatch.setattr(stimlink.hasher, "generate", busy)
+    assert stimlink.check_and_rehash(u, "secret")
+    assert u.password_hash == old_hash
@@ -0,0 +1,55 @@
+# tests/test_hashing.py
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from hashing import HashingPool, HashingPoolBusy
+
+
+def make_pool(method="pbkdf2:sha256:1000", max_pending=8):
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD=method, HASH_POOL_WORKERS=1, HASH_POOL_MAX_PENDING=max_pending)
+    return HashingPool(app)
+
+
+def test_generate_and_check():
+    pool = make_pool()
+    pwhash = pool.generate("secret")
+    assert pool.check(pwhash, "secret")
+    assert not pool.check(pwhash, "wrong")
+    assert pool.stats()["completed"] == 3
+
+
+def test_needs_rehash_after_method_change():
+    old = make_pool("pbkdf2:sha256:1000")
+    new = make_pool("pbkdf2:sha256:2000")
+    pwhash = old.generate("secret")
+    assert not old.needs_rehash(pwhash)
+    assert new.needs_rehash(pwhash)
+    assert not new.needs_rehash(new.generate("secret"))
+
+
+def test_needs_rehash_accepts_method_shorthand():
+    pool = make_pool("scrypt")
+    assert not pool.needs_rehash(pool.generate("secret"))
+
+
+def test_full_queue_raises_busy():
+    pool = make_pool(max_pending=1)
+    release = threading.Event()
+    worker = threading.Thread(target=pool._run, args=(release.wait,))
+    worker.start()
+    try:
+        while pool.stats()["pending"] < 1:
+            time.sleep(0.01)
+        with pytest.raises(HashingPoolBusy):
+            pool.check("pbkdf2:sha256:1000$salt$hash", "secret")
+    finally:
+        release.set()
+        worker.join()
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["pending"] == 0
+    assert stats["peak_pending"] == 1
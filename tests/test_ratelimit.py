@@ -0,0 +1,161 @@
+# tests/test_ratelimit.py
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+import ratelimit
+from models import db, User
+from ratelimit import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.config.update(
+        RATELIMIT_STORAGE=str(tmp_path / "ratelimit.sqlite3"),
+        RATELIMIT_SWEEP_INTERVAL=0,
+        RATELIMITS={
+            "login": {"ip": (5, 50), "identifier": (2, 20), "identifier_per_ip": True},
+            "forgot": {"ip": (5, 50), "identifier": (2, 20)},
+        },
+    )
+    lim = RateLimiter(app)
+    lim.app = app
+    return lim
+
+
+def row(limiter, key):
+    return limiter._conn().execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+
+
+def test_burst_then_denied(limiter, clock):
+    assert [limiter.hit("k", 3, 30) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit("k", 3, 30) == pytest.approx(10)
+
+
+def test_refill(limiter, clock):
+    for _ in range(3):
+        limiter.hit("k", 3, 30)
+    clock[0] += 5
+    assert limiter.hit("k", 3, 30) == pytest.approx(5)
+    clock[0] += 5
+    assert limiter.hit("k", 3, 30) == 0
+    assert limiter.hit("k", 3, 30) > 0
+
+
+def test_denied_hit_does_not_write(limiter, clock):
+    for _ in range(3):
+        limiter.hit("k", 3, 30)
+    before = row(limiter, "k")
+    clock[0] += 1
+    assert limiter.hit("k", 3, 30) > 0
+    assert row(limiter, "k") == before
+
+
+def test_peek_does_not_consume(limiter, clock):
+    assert limiter.peek("k", 1, 10) == 0
+    assert limiter.peek("k", 1, 10) == 0
+    assert limiter.hit("k", 1, 10) == 0
+    assert limiter.peek("k", 1, 10) == pytest.approx(10)
+
+
+def test_sweep_evicts_full_buckets(limiter, clock):
+    limiter.hit("idle", 3, 30)
+    limiter.hit("busy", 3, 30)
+    clock[0] += 5
+    limiter.hit("busy", 3, 30)
+    assert row(limiter, "idle") is not None
+    clock[0] += 6
+    limiter.hit("busy", 3, 30)
+    assert row(limiter, "idle") is None
+    assert row(limiter, "busy") is not None
+
+
+def test_ip_bucket_is_per_client(limiter, clock):
+    with limiter.app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        assert [limiter.check("login") for _ in range(5)] == [0] * 5
+        assert limiter.check("login") > 0
+    with limiter.app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.2"}):
+        assert limiter.check("login") == 0
+
+
+def test_identifier_bucket_cannot_lock_out_other_ips(limiter, clock):
+    with limiter.app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        limiter.charge_identifier("login", "victim@example.com")
+        limiter.charge_identifier("login", "victim@example.com")
+        assert limiter.identifier_retry("login", " VICTIM@example.com") > 0
+    with limiter.app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.2"}):
+        assert limiter.identifier_retry("login", "victim@example.com") == 0
+
+
+def test_limit_decorator_redirects_with_retry_after(limiter, clock):
+    app = limiter.app
+
+    @app.route("/login", methods=["GET", "POST"])
+    @limiter.limit("login")
+    def login():
+        return "ok"
+
+    client = app.test_client()
+    for _ in range(5):
+        assert client.post("/login").status_code == 200
+    resp = client.post("/login")
+    assert resp.status_code == 302
+    assert resp.headers["Retry-After"] == "10"
+    assert client.get("/login").status_code == 200
+
+
+def test_login_charges_identifier_only_on_failure(stimlink, monkeypatch):
+    monkeypatch.setattr(stimlink, "render_template", lambda *args, **kwargs: "")
+    db.session.add(User(nom="Jean", post_nom="K", prenom="Dupont", username="JEANDUPONT", email="jean@example.com",
+                        numero_compte="STL-000-000-001", solde=Decimal("0.00"),
+                        password_hash=stimlink.hasher.generate("secret")))
+    db.session.commit()
+    stimlink.backfill_identifiers()
+    client = stimlink.app.test_client()
+    environ = {"REMOTE_ADDR": "10.1.1.1"}
+    for _ in range(12):
+        resp = client.post("/login", data={"identifier": "jean@example.com", "password": "secret"}, environ_base=environ)
+        assert resp.headers["Location"].endswith("/dashboard")
+    for _ in range(10):
+        client.post("/login", data={"identifier": "jean@example.com", "password": "wrong"}, environ_base=environ)
+    resp = client.post("/login", data={"identifier": "jean@example.com", "password": "secret"}, environ_base=environ)
+    assert "Retry-After" in resp.headers
+
+
+def test_unusable_storage_fails_open(tmp_path):
+    app = Flask(__name__)
+    app.config.update(RATELIMIT_STORAGE=str(tmp_path / "absent" / "ratelimit.sqlite3"))
+    lim = RateLimiter(app)
+    assert lim.hit("k", 1, 10) == 0
+    assert lim.hit("k", 1, 10) == 0
+
+
+def test_signup_validation_errors_are_not_charged(stimlink):
+    client = stimlink.app.test_client()
+    environ = {"REMOTE_ADDR": "10.2.2.2"}
+    form = {"nom": "Marie", "post_nom": "K", "prenom": "Luse", "sexe": "F", "adresse_residence": "Gombe",
+            "telephone": "0810000000", "email": "marie@example.com", "password": "secret", "confirm": "autre"}
+    for _ in range(10):
+        resp = client.post("/signup", data=form, environ_base=environ)
+        assert "Retry-After" not in resp.headers
+    resp = client.post("/signup", data=dict(form, confirm="secret"), environ_base=environ)
+    assert resp.headers["Location"].endswith("/login")
+
+
+def test_forgot_identifier_bucket_is_shared_across_ips(limiter, clock):
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        with limiter.app.test_request_context(environ_base={"REMOTE_ADDR": ip}):
+            assert limiter.check("forgot", "victim@example.com") == 0
+    with limiter.app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.3"}):
+        assert limiter.check("forgot", "VICTIM@example.com") > 0
+        assert limiter.check("forgot", "other@example.com") == 0